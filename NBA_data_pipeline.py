@@ -4,61 +4,131 @@ import numpy as np
 from datetime import datetime
 import asyncio
 import aiohttp
+import orjson
 from typing import Dict, List, Optional
 import logging
 
+SHOT_CHART_COLUMNS = ['GAME_ID', 'PLAYER_ID', 'SHOT_TYPE', 'SHOT_ZONE',
+                      'SHOT_DISTANCE', 'LOC_X', 'LOC_Y', 'SHOT_MADE_FLAG']
+
+# Explicit dtypes for numeric shot chart columns; the rest are left to NumPy inference
+SHOT_CHART_DTYPES = {
+    'PLAYER_ID': np.int32,
+    'SHOT_DISTANCE': np.float32,
+    'LOC_X': np.float32,
+    'LOC_Y': np.float32,
+    'SHOT_MADE_FLAG': np.int8,
+}
+
+# Low-cardinality string columns stored as dictionary-encoded categoricals
+SHOT_CHART_CATEGORICALS = {'SHOT_TYPE', 'SHOT_ZONE'}
+
+def nearest_defender_distance(shot_xy: np.ndarray,
+                              shot_frames: np.ndarray,
+                              defender_xy: np.ndarray) -> np.ndarray:
+    """
+    Distance from each shot to its closest defender at the frame of release.
+    shot_xy is (n_shots, 2), shot_frames is (n_shots,) frame indices and
+    defender_xy is (n_frames, n_defenders, 2); returns (n_shots,) float32
+    """
+    offsets = defender_xy[shot_frames] - shot_xy[:, np.newaxis, :]
+    distances = np.hypot(offsets[..., 0], offsets[..., 1], dtype=np.float32)
+    return distances.min(axis=1)
+
 class NBADataPipeline:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, max_concurrent_requests: int = 8):
         self.base_url = "https://api.nba.com/stats"
-        self.headers = {
-            "Accept": "application/json",
-            "Authorization": f"Bearer {api_key}" if api_key else None
-        }
+        self.headers = {"Accept": "application/json"}
+        if api_key:
+            self.headers["Authorization"] = f"Bearer {api_key}"
         self.logger = logging.getLogger(__name__)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._sem = asyncio.Semaphore(max_concurrent_requests)
+        # Seconds the API asked us to wait after the last 429, if any
+        self.retry_after: Optional[float] = None
+
+    async def __aenter__(self) -> "NBADataPipeline":
+        """
+        Open a shared HTTP session so keep-alive connections are reused across polls
+        """
+        self._session = aiohttp.ClientSession(
+            headers=self.headers,
+            connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300, keepalive_timeout=75),
+            json_serialize=lambda obj: orjson.dumps(obj).decode()
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._session:
+            await self._session.close()
+            self._session = None
         
     async def fetch_game_data(self, game_id: str) -> Dict:
         """
         Fetch real-time game data asynchronously
         """
-        async with aiohttp.ClientSession() as session:
-            endpoints = {
-                'play_by_play': f"/playbyplayv2?GameID={game_id}",
-                'shot_chart': f"/shotchartdetail?GameID={game_id}",
-                'player_tracking': f"/boxscoreplayertrackv2?GameID={game_id}"
-            }
-            
-            tasks = []
-            for name, endpoint in endpoints.items():
-                tasks.append(self.fetch_endpoint(session, endpoint))
-            
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            return dict(zip(endpoints.keys(), results))
+        endpoints = {
+            'play_by_play': f"/playbyplayv2?GameID={game_id}",
+            'shot_chart': f"/shotchartdetail?GameID={game_id}",
+            'player_tracking': f"/boxscoreplayertrackv2?GameID={game_id}"
+        }
+        
+        tasks = []
+        for name, endpoint in endpoints.items():
+            tasks.append(self.fetch_endpoint(endpoint))
+        
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return dict(zip(endpoints.keys(), results))
     
-    async def fetch_endpoint(self, session: aiohttp.ClientSession, endpoint: str) -> Dict:
+    async def fetch_endpoint(self, endpoint: str) -> Dict:
         """
         Fetch data from a specific endpoint
         """
         try:
-            async with session.get(f"{self.base_url}{endpoint}", headers=self.headers) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    self.logger.error(f"Error fetching {endpoint}: {response.status}")
-                    return None
+            async with self._sem:
+                async with self._session.get(f"{self.base_url}{endpoint}") as response:
+                    if response.status == 200:
+                        return orjson.loads(await response.read())
+                    elif response.status == 429:
+                        self.retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+                        self.logger.warning(f"Rate limited fetching {endpoint}, retry after {self.retry_after}s")
+                        return None
+                    else:
+                        self.logger.error(f"Error fetching {endpoint}: {response.status}")
+                        return None
         except Exception as e:
             self.logger.error(f"Exception fetching {endpoint}: {str(e)}")
             return None
 
-    def process_shot_data(self, raw_data: Dict) -> pd.DataFrame:
+    @staticmethod
+    def _parse_retry_after(value: Optional[str], default: float = 5.0) -> float:
         """
-        Process raw shot data into structured DataFrame
+        Parse a Retry-After header given in seconds, falling back to a default delay
+        """
+        try:
+            return max(0.0, float(value))
+        except (TypeError, ValueError):
+            return default
+
+    def process_shot_data(self, raw_data: Dict, start_row: int = 0) -> pd.DataFrame:
         """
-        shots = pd.DataFrame(raw_data['shot_chart']['resultSets'][0]['rowSet'],
-                           columns=['GAME_ID', 'PLAYER_ID', 'SHOT_TYPE', 'SHOT_ZONE',
-                                  'SHOT_DISTANCE', 'LOC_X', 'LOC_Y', 'SHOT_MADE_FLAG'])
+        Process raw shot data into structured DataFrame, skipping the first
+        start_row shots that have already been processed
+        """
+        row_set = raw_data['shot_chart']['resultSets'][0]['rowSet'][start_row:]
+        
+        # Transpose rows into columns once and build each column as a typed array
+        columns = list(zip(*row_set)) if row_set else [()] * len(SHOT_CHART_COLUMNS)
+        shots = pd.DataFrame({
+            name: pd.Categorical(col) if name in SHOT_CHART_CATEGORICALS
+            else np.asarray(col, dtype=SHOT_CHART_DTYPES.get(name))
+            for name, col in zip(SHOT_CHART_COLUMNS, columns)
+        })
         
         # Add derived features
-        shots['SHOT_ANGLE'] = np.arctan2(shots['LOC_Y'], shots['LOC_X'])
+        loc_x = shots['LOC_X'].to_numpy(np.float32, copy=False)
+        loc_y = shots['LOC_Y'].to_numpy(np.float32, copy=False)
+        shots['SHOT_ANGLE'] = np.arctan2(loc_y, loc_x, dtype=np.float32)
         shots['SHOT_CLOCK'] = self._calculate_shot_clock(raw_data['play_by_play'])
         shots['DEFENDER_DISTANCE'] = self._get_defender_distance(raw_data['player_tracking'])
         
@@ -75,35 +145,56 @@ class NBADataPipeline:
         """
         Calculate closest defender distance from player tracking data
         """
-        # Implementation details for defender distance calculation
+        # Implementation details for defender distance calculation: extract shot
+        # positions/frames and per-frame defender positions as arrays once, then
+        # call nearest_defender_distance (no per-shot Python loop)
         pass
 
 class StreamProcessor:
-    def __init__(self, pipeline: NBADataPipeline):
+    def __init__(self, pipeline: NBADataPipeline, poll_interval: float = 1.0, max_backoff: float = 60.0):
         self.pipeline = pipeline
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
         self.current_game_data = {}
+        self.logger = logging.getLogger(__name__)
+        
+        # Shots are append-only within a game, so only the delta is processed each tick
+        self._shots_processed = 0
+        self._shot_chunks: List[pd.DataFrame] = []
+        self._shots: Optional[pd.DataFrame] = None
         
     async def process_stream(self, game_id: str):
         """
         Process real-time game stream
         """
-        while True:
-            try:
-                # Fetch latest game data
-                new_data = await self.pipeline.fetch_game_data(game_id)
-                
-                # Process and update current game state
-                self._update_game_state(new_data)
-                
-                # Emit updated data to subscribers
-                await self._emit_updates()
-                
-                # Wait for next update interval
-                await asyncio.sleep(1)  # Adjust based on API rate limits
-                
-            except Exception as e:
-                self.logger.error(f"Stream processing error: {str(e)}")
-                await asyncio.sleep(5)  # Back off on error
+        backoff = self.poll_interval
+        async with self.pipeline:
+            while True:
+                try:
+                    # Fetch latest game data
+                    new_data = await self.pipeline.fetch_game_data(game_id)
+                    
+                    # Honour the server's Retry-After instead of hammering a rate-limited API
+                    if self.pipeline.retry_after is not None:
+                        delay, self.pipeline.retry_after = self.pipeline.retry_after, None
+                        await asyncio.sleep(delay)
+                        continue
+                    
+                    # Process and update current game state
+                    self._update_game_state(new_data)
+                    
+                    # Emit updated data to subscribers
+                    await self._emit_updates()
+                    
+                    # Wait for next update interval
+                    backoff = self.poll_interval
+                    await asyncio.sleep(self.poll_interval)
+                    
+                except Exception as e:
+                    self.logger.error(f"Stream processing error: {str(e)}")
+                    # Exponential back off on error, capped at max_backoff
+                    backoff = min(backoff * 2, self.max_backoff)
+                    await asyncio.sleep(backoff)
     
     def _update_game_state(self, new_data: Dict):
         """
@@ -111,10 +202,42 @@ class StreamProcessor:
         """
         # Merge new data with current state
         self.current_game_data.update(new_data)
+        self._append_new_shots(new_data)
         
         # Process any derived metrics
         self._calculate_derived_metrics()
     
+    def _append_new_shots(self, new_data: Dict):
+        """
+        Process only the shots added since the previous tick
+        """
+        shot_chart = new_data.get('shot_chart')
+        if not isinstance(shot_chart, dict):
+            return
+        
+        row_count = len(shot_chart['resultSets'][0]['rowSet'])
+        if row_count <= self._shots_processed:
+            return
+        
+        self._shot_chunks.append(
+            self.pipeline.process_shot_data(new_data, start_row=self._shots_processed)
+        )
+        self._shots_processed = row_count
+        self._shots = None
+    
+    @property
+    def shots(self) -> pd.DataFrame:
+        """
+        All shots processed so far, concatenated lazily on first access after an update
+        """
+        if self._shots is None:
+            if self._shot_chunks:
+                self._shots = pd.concat(self._shot_chunks, ignore_index=True)
+            else:
+                self._shots = pd.DataFrame(columns=SHOT_CHART_COLUMNS)
+            self._shot_chunks = [self._shots]
+        return self._shots
+    
     def _calculate_derived_metrics(self):
         """
         Calculate derived metrics from current game state
@@ -139,4 +262,11 @@ async def main():
     await processor.process_stream(game_id)
 
 if __name__ == "__main__":
+    # Use the libuv-based event loop when available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     asyncio.run(main())
\ No newline at end of file
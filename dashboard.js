@@ -167,6 +167,43 @@ const ShotPrediction = ({ prediction }) => (
   </Alert>
 );
 
+// Binary heatmap frames (see RealTimeAnalytics.encode_probabilities and
+// encode_probability_delta). Full frames: uint16 column and row counts, then float32
+// probabilities with x varying slowest. Delta frames: a zero uint16 marker, the uint16
+// cell count, the cell indices padded to 4 bytes, then the cells' float32 probabilities,
+// patched into the previous points
+const decodeHeatmapFrame = (buffer, previousPoints, courtWidth = 500, courtHeight = 470) => {
+  const header = new DataView(buffer);
+
+  if (header.getUint16(0, true) === 0) {
+    const count = header.getUint16(2, true);
+    const indices = new Uint16Array(buffer, 4, count);
+    const values = new Float32Array(buffer, 4 + 2 * (count + (count % 2)), count);
+    const points = previousPoints.slice();
+    for (let n = 0; n < count; n++) {
+      points[indices[n]] = { ...points[indices[n]], probability: values[n] };
+    }
+    return points;
+  }
+
+  const columns = header.getUint16(0, true);
+  const rows = header.getUint16(2, true);
+  const probabilities = new Float32Array(buffer, 4, columns * rows);
+  const points = new Array(probabilities.length);
+
+  for (let i = 0; i < columns; i++) {
+    for (let j = 0; j < rows; j++) {
+      const k = i * rows + j;
+      points[k] = {
+        x: (i / (columns - 1)) * courtWidth,
+        y: (j / (rows - 1)) * courtHeight,
+        probability: probabilities[k]
+      };
+    }
+  }
+  return points;
+};
+
 const ShotAnalyticsDashboard = () => {
   const [selectedPlayer, setSelectedPlayer] = useState(null);
   const [timeRange, setTimeRange] = useState('game');
@@ -187,6 +224,7 @@ const ShotAnalyticsDashboard = () => {
     fetchGameData();
     // Set up WebSocket connection for real-time updates
     const ws = new WebSocket('ws://your-backend/game-stream');
+    ws.binaryType = 'arraybuffer';
     ws.onmessage = handleRealTimeUpdate;
     
     return () => ws.close();
@@ -205,6 +243,14 @@ const ShotAnalyticsDashboard = () => {
   };
 
   const handleRealTimeUpdate = (event) => {
+    if (event.data instanceof ArrayBuffer) {
+      setGameData(prevData => ({
+        ...prevData,
+        heatmapData: decodeHeatmapFrame(event.data, prevData.heatmapData)
+      }));
+      return;
+    }
+
     const update = JSON.parse(event.data);
     setGameData(prevData => ({
       ...prevData,
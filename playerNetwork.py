@@ -1,14 +1,47 @@
+import gc
 import tensorflow as tf
+from tensorflow.python.framework.convert_to_constants import convert_variables_to_constants_v2
 import keras
 from keras import layers, models
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from typing import List, Tuple, Dict
 import pandas as pd
 
+# Per-timestep inputs: x, y, speed, direction, game context
+FEATURE_COLUMNS = ['LOC_X', 'LOC_Y', 'SPEED', 'DIRECTION',
+                   'GAME_CLOCK', 'SHOT_CLOCK', 'SCORE_DIFFERENTIAL',
+                   'DEFENDER_DISTANCE', 'BALL_X', 'BALL_Y', 'BALL_Z',
+                   'GAME_PERIOD']
+
+# Next position and velocity
+TARGET_COLUMNS = ['LOC_X', 'LOC_Y', 'VELOCITY_X', 'VELOCITY_Y']
+
 class PlayerMovementPredictor:
-    def __init__(self, sequence_length: int = 10):
+    def __init__(self, sequence_length: int = 10, mixed_precision: bool = False):
         self.sequence_length = sequence_length
-        self.model = self._build_model()
+        
+        # bfloat16 compute with float32 variables; needs no loss scaling, unlike float16.
+        # The global policy only applies while the layers are built, then is restored
+        previous_policy = tf.keras.mixed_precision.global_policy()
+        try:
+            if mixed_precision:
+                tf.keras.mixed_precision.set_global_policy('mixed_bfloat16')
+            self.model = self._build_model()
+        finally:
+            tf.keras.mixed_precision.set_global_policy(previous_policy)
+        
+        # Contiguous float32 feature/target matrices with one row range per player
+        self._feature_matrix = np.empty((0, len(FEATURE_COLUMNS)), dtype=np.float32)
+        self._target_matrix = np.empty((0, len(TARGET_COLUMNS)), dtype=np.float32)
+        self._player_ranges: Dict[int, slice] = {}
+        
+        # Compiled batched forward pass, bypassing Keras' predict() dispatch
+        self._predict_fn = tf.function(
+            lambda x: self.model(x, training=False), jit_compile=True
+        ).get_concrete_function(
+            tf.TensorSpec([None, sequence_length, len(FEATURE_COLUMNS)], tf.float32)
+        )
         
     def _build_model(self) -> models.Model:
         """
@@ -18,13 +51,18 @@ class PlayerMovementPredictor:
             # Input layer for sequence of positions and game states
             layers.Input(shape=(self.sequence_length, 12)),  # x, y, speed, direction, game context
             
-            # LSTM layers for sequence processing
-            layers.LSTM(128, return_sequences=True),
+            # LSTM layers for sequence processing, kept to the cuDNN kernel's
+            # requirements (tanh/sigmoid, no recurrent dropout, not unrolled)
+            layers.LSTM(128, return_sequences=True, activation='tanh',
+                        recurrent_activation='sigmoid', recurrent_dropout=0.0,
+                        unroll=False, use_bias=True),
             layers.Dropout(0.2),
-            layers.LayerNormalization(),
             
-            layers.LSTM(64),
+            layers.LSTM(64, activation='tanh', recurrent_activation='sigmoid',
+                        recurrent_dropout=0.0, unroll=False, use_bias=True),
             layers.Dropout(0.2),
+            
+            # Normalize once after the recurrent stack
             layers.LayerNormalization(),
             
             # Dense layers for movement prediction
@@ -32,7 +70,7 @@ class PlayerMovementPredictor:
             layers.Dense(16, activation='relu'),
             
             # Output layer for predicted position and movement vector
-            layers.Dense(4)  # predicted x, y, velocity_x, velocity_y
+            layers.Dense(4, dtype='float32')  # predicted x, y, velocity_x, velocity_y; kept float32 for a stable loss
         ])
         
         model.compile(
@@ -43,34 +81,62 @@ class PlayerMovementPredictor:
         
         return model
     
+    def _index_movement_data(self, movement_data: pd.DataFrame):
+        """
+        Extract feature and target columns once into contiguous matrices and
+        record each player's row range
+        """
+        # Group each player's rows into one contiguous block, keeping their original order
+        if not movement_data['PLAYER_ID'].is_monotonic_increasing:
+            movement_data = movement_data.sort_values('PLAYER_ID', kind='stable')
+        self._feature_matrix = movement_data[FEATURE_COLUMNS].to_numpy(np.float32)
+        self._target_matrix = movement_data[TARGET_COLUMNS].to_numpy(np.float32)
+        
+        player_ids = movement_data['PLAYER_ID'].to_numpy()
+        unique_ids, starts = np.unique(player_ids, return_index=True)
+        ends = np.append(starts[1:], len(player_ids))
+        self._player_ranges = {
+            player_id: slice(start, end)
+            for player_id, start, end in zip(unique_ids, starts, ends)
+        }
+    
+    def player_sequence(self, player_id, start: int) -> np.ndarray:
+        """
+        Zero-copy view of one player's feature window beginning at row offset start
+        """
+        rows = self._player_ranges[player_id]
+        return self._feature_matrix[rows.start + start:rows.start + start + self.sequence_length]
+    
     def prepare_sequence_data(self, movement_data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
         """
         Prepare sequential data for training
         """
+        self._index_movement_data(movement_data)
+        
         sequences = []
-        targets = []
+        sequence_targets = []
         
-        for player_id in movement_data['PLAYER_ID'].unique():
-            player_data = movement_data[movement_data['PLAYER_ID'] == player_id]
+        for rows in self._player_ranges.values():
+            if rows.stop - rows.start <= self.sequence_length:
+                continue
+            
+            # Strided views over rows [i, i + sequence_length); the row after each window is its target
+            windows = sliding_window_view(
+                self._feature_matrix[rows], (self.sequence_length, len(FEATURE_COLUMNS))
+            )[:-1, 0]
             
-            for i in range(len(player_data) - self.sequence_length - 1):
-                # Extract sequence of positions and game states
-                sequence = player_data.iloc[i:i+self.sequence_length][
-                    ['LOC_X', 'LOC_Y', 'SPEED', 'DIRECTION', 
-                     'GAME_CLOCK', 'SHOT_CLOCK', 'SCORE_DIFFERENTIAL',
-                     'DEFENDER_DISTANCE', 'BALL_X', 'BALL_Y', 'BALL_Z',
-                     'GAME_PERIOD']
-                ].values
-                
-                # Target is next position and velocity
-                target = player_data.iloc[i+self.sequence_length][
-                    ['LOC_X', 'LOC_Y', 'VELOCITY_X', 'VELOCITY_Y']
-                ].values
-                
-                sequences.append(sequence)
-                targets.append(target)
-        
-        return np.array(sequences), np.array(targets)
+            sequences.append(windows)
+            sequence_targets.append(self._target_matrix[rows.start + self.sequence_length:rows.stop])
+        
+        if not sequences:
+            return (np.empty((0, self.sequence_length, len(FEATURE_COLUMNS)), dtype=np.float32),
+                    np.empty((0, len(TARGET_COLUMNS)), dtype=np.float32))
+        
+        # A single player's windows can be returned as views without copying
+        if len(sequences) == 1:
+            return sequences[0], sequence_targets[0]
+        
+        return np.concatenate(sequences), np.concatenate(sequence_targets)
     
     def train(self, movement_data: pd.DataFrame, epochs: int = 50, batch_size: int = 32):
         """
@@ -83,12 +149,20 @@ class PlayerMovementPredictor:
         X_train, X_val = X[:split_idx], X[split_idx:]
         y_train, y_val = y[:split_idx], y[split_idx:]
         
+        # Stream batches through tf.data so input prep overlaps with the training step
+        train_ds = (tf.data.Dataset.from_tensor_slices((X_train, y_train))
+                    .shuffle(8192)
+                    .batch(batch_size)
+                    .prefetch(tf.data.AUTOTUNE))
+        val_ds = (tf.data.Dataset.from_tensor_slices((X_val, y_val))
+                  .batch(batch_size)
+                  .prefetch(tf.data.AUTOTUNE))
+        
         # Train model
         history = self.model.fit(
-            X_train, y_train,
-            validation_data=(X_val, y_val),
+            train_ds,
+            validation_data=val_ds,
             epochs=epochs,
-            batch_size=batch_size,
             callbacks=[
                 tf.keras.callbacks.EarlyStopping(patience=5, restore_best_weights=True),
                 tf.keras.callbacks.ReduceLROnPlateau(factor=0.5, patience=3)
@@ -97,42 +171,109 @@ class PlayerMovementPredictor:
         
         return history
     
+    def export_onnx(self, path: str, opset: int = 17):
+        """
+        Export the model to ONNX for building an FP16 TensorRT engine offline, e.g.
+        trtexec --onnx=model.onnx --fp16 --saveEngine=model.plan --builderOptimizationLevel=3
+        """
+        import tf2onnx
+        
+        input_signature = [tf.TensorSpec([None, self.sequence_length, len(FEATURE_COLUMNS)],
+                                         tf.float32, name='sequence')]
+        tf2onnx.convert.from_keras(self.model, input_signature=input_signature,
+                                   opset=opset, output_path=path)
+    
+    def export_tflite(self, path: str, representative_sequences: np.ndarray, num_samples: int = 200):
+        """
+        Export a post-training quantized TFLite model; the Dense head is calibrated to INT8
+        while LSTM ops fall back to float kernels
+        """
+        def representative_dataset():
+            for i in range(min(num_samples, len(representative_sequences))):
+                yield [representative_sequences[i:i+1].astype(np.float32)]
+        
+        converter = tf.lite.TFLiteConverter.from_keras_model(self.model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [
+            tf.lite.OpsSet.TFLITE_BUILTINS,
+            tf.lite.OpsSet.SELECT_TF_OPS
+        ]
+        
+        with open(path, 'wb') as f:
+            f.write(converter.convert())
+    
+    def freeze(self):
+        """
+        Fold trained weights into a constant inference graph and release the Keras
+        model, optimizer state and training data; the predictor is inference-only afterwards.
+        Calling it again on a frozen predictor does nothing
+        """
+        if self.model is None:
+            return
+        
+        frozen_fn = convert_variables_to_constants_v2(self._predict_fn)
+        self._predict_fn = lambda x: frozen_fn(x)[0]
+        
+        self.model = None
+        # Fresh empty arrays: slicing to zero rows would keep the training buffers alive
+        self._feature_matrix = np.empty((0, len(FEATURE_COLUMNS)), dtype=np.float32)
+        self._target_matrix = np.empty((0, len(TARGET_COLUMNS)), dtype=np.float32)
+        self._player_ranges = {}
+        gc.collect()
+    
     def predict_movement(self, sequence: np.ndarray) -> Dict[str, float]:
         """
         Predict next position and movement vector
         """
-        prediction = self.model.predict(sequence.reshape(1, self.sequence_length, 12))[0]
+        return self.predict_movements(
+            sequence.reshape(1, self.sequence_length, len(FEATURE_COLUMNS))
+        )[0]
+    
+    def predict_movements(self, sequences: np.ndarray) -> List[Dict[str, float]]:
+        """
+        Predict next position and movement vector for a batch of sequences in one call
+        """
+        predictions = self._predict_fn(tf.constant(sequences, dtype=tf.float32)).numpy()
         
-        return {
-            'predicted_x': prediction[0],
-            'predicted_y': prediction[1],
-            'predicted_velocity_x': prediction[2],
-            'predicted_velocity_y': prediction[3]
-        }
+        return [
+            {
+                'predicted_x': prediction[0],
+                'predicted_y': prediction[1],
+                'predicted_velocity_x': prediction[2],
+                'predicted_velocity_y': prediction[3]
+            }
+            for prediction in predictions
+        ]
 
 class DefenseAnalyzer:
     def __init__(self, movement_predictor: PlayerMovementPredictor):
         self.movement_predictor = movement_predictor
         
     def analyze_defensive_coverage(self, 
-                                 offensive_player: Dict, 
+                                 offensive_players: List[Dict], 
                                  defenders: List[Dict], 
-                                 game_state: Dict) -> Dict:
+                                 game_state: Dict) -> List[Dict]:
         """
         Analyze defensive coverage and predict optimal defensive positions
+        for every offensive player on the floor
         """
-        # Predict offensive player's next move
-        offensive_sequence = self._prepare_offensive_sequence(offensive_player, game_state)
-        predicted_movement = self.movement_predictor.predict_movement(offensive_sequence)
+        # Predict all offensive players' next moves in a single batched call
+        offensive_sequences = np.stack([
+            self._prepare_offensive_sequence(offensive_player, game_state)
+            for offensive_player in offensive_players
+        ])
+        predicted_movements = self.movement_predictor.predict_movements(offensive_sequences)
         
         # Calculate optimal defensive positions
-        defensive_analysis = self._calculate_defensive_positions(
-            predicted_movement,
-            defenders,
-            game_state
-        )
-        
-        return defensive_analysis
+        return [
+            self._calculate_defensive_positions(
+                predicted_movement,
+                defenders,
+                game_state
+            )
+            for predicted_movement in predicted_movements
+        ]
     
     def _prepare_offensive_sequence(self, 
                                   offensive_player: Dict, 
@@ -166,11 +307,13 @@ def main():
     movement_predictor.train(movement_data)
     
     # Analyze defensive coverage
-    offensive_player = {
-        'player_id': '203999',
-        'position': {'x': 0, 'y': 0},
-        'velocity': {'x': 1, 'y': 1}
-    }
+    offensive_players = [
+        {
+            'player_id': '203999',
+            'position': {'x': 0, 'y': 0},
+            'velocity': {'x': 1, 'y': 1}
+        }
+    ]
     
     defenders = [
         {'player_id': '201939', 'position': {'x': 2, 'y': 2}},
@@ -184,7 +327,7 @@ def main():
     }
     
     analysis = defense_analyzer.analyze_defensive_coverage(
-        offensive_player,
+        offensive_players,
         defenders,
         game_state
     )
@@ -1,30 +1,37 @@
 import asyncio
-import json
-import random
+import gzip
+import orjson
+import msgspec
 import math
-from typing import Dict, List, Optional
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+import time
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import ORJSONResponse, Response
 import redis.asyncio as redis
-from pydantic import BaseModel
 import logging
 from datetime import datetime
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass, field
 
 # Global variables
 redis_client = None
-active_connections: Dict[str, List[WebSocket]] = {}
+active_connections: Dict[str, Set["Connection"]] = {}
 
-# Set up detailed logging
+# Pending closes of slow clients' sockets, referenced until done so they are not garbage-collected
+close_tasks: Set[asyncio.Task] = set()
+
+# Set up logging
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
 # Models (keep your existing models)
-class GameState(BaseModel):
+class GameState(msgspec.Struct):
     game_id: str
     timestamp: datetime
     shot_clock: float
@@ -33,7 +40,7 @@ class GameState(BaseModel):
     score_home: int
     score_away: int
 
-class PlayerPosition(BaseModel):
+class PlayerPosition(msgspec.Struct):
     player_id: str
     x: float
     y: float
@@ -41,35 +48,123 @@ class PlayerPosition(BaseModel):
     velocity_y: float
     team_id: str
 
-class GameUpdate(BaseModel):
+class GameUpdate(msgspec.Struct):
     game_state: GameState
     player_positions: List[PlayerPosition]
     shot_data: Optional[Dict] = None
 
+class ClientMessage(msgspec.Struct):
+    type: str = ""
+
+# Reusable decoder that validates JSON client messages straight into the struct above
+client_message_decoder = msgspec.json.Decoder(ClientMessage)
+
 # Global variables
 redis_client = None
-active_connections: Dict[str, List[WebSocket]] = {}
+active_connections: Dict[str, Set["Connection"]] = {}
+
+# Redis connections shared by request handlers and the Pub/Sub relay; callers wait up to a
+# second for a free connection when all are in use
+REDIS_MAX_CONNECTIONS = 64
+
+# Game state is kept in a Redis hash per game, expiring after an hour without updates
+GAME_STATE_TTL = 3600
+
+# Latest update this worker saved per game, as (monotonic save time, JSON payload), so reads can
+# skip Redis; an entry is dropped once another worker publishes a different state for the game.
+# Kept oldest save first so expired games are evicted on each write, even if never read again
+state_cache: OrderedDict[str, Tuple[float, bytes]] = OrderedDict()
+
+# Player position fields stored in Redis as one packed array per game instead of per-player JSON
+POSITION_FIELDS = ("x", "y", "velocity_x", "velocity_y")
+POSITION_DTYPE = np.dtype("<f8")
+
+# Random generator for the game simulator, plus a pool of pre-drawn uniform samples
+# that movement noise is sliced from instead of calling the generator every tick
+rng = np.random.default_rng()
+NOISE_POOL_SIZE = 1 << 16
+noise_pool = rng.random(NOISE_POOL_SIZE)
+noise_index = 0
+
+# Movement target areas per role: (x range, y range) boxes, and the three-point arc
+# shooting guards move around
+ROLE_TARGET_BOUNDS = {
+    "PG": ((-10, 10), (25, 35)),  # Point Guard - stay near top of key
+    "C": ((-8, 8), (5, 15)),      # Center - stay in the paint area
+}
+SG_ARC_RADIUS = 22
+SG_ARC_CENTER_Y = 15
+
+# Basket position and the NBA three-point distance, squared so shots can be classified without a sqrt
+BASKET_Y = 5.5
+THREE_POINT_DISTANCE_SQ = 23.75 ** 2
+
+# Clients requesting the "msgpack" subprotocol (or connecting with ?format=msgpack) exchange
+# binary MessagePack frames instead of JSON text
+JSON_FORMAT = "json"
+MSGPACK_FORMAT = "msgpack"
+WIRE_FORMATS = (JSON_FORMAT, MSGPACK_FORMAT)
+msgpack_encoder = msgspec.msgpack.Encoder()
+msgpack_decoder = msgspec.msgpack.Decoder(ClientMessage)
+
+# Redis Pub/Sub channel prefix that game updates are published on, one channel per game
+GAME_UPDATES_CHANNEL = "game_updates"
+
+# Maximum number of outbound frames buffered per client before the stalest is dropped
+CLIENT_QUEUE_SIZE = 64
+
+# Clients that keep overflowing their queue for this many frames in a row are disconnected
+MAX_DROPPED_FRAMES = 64
+
+# Seconds a single frame may take to send before the client is treated as stalled
+SEND_TIMEOUT = 5.0
+
+# Clients whose queue stays at or above the high watermark for longer than SLOW_CLIENT_TIMEOUT
+# seconds are disconnected even if no frames have been dropped yet
+QUEUE_HIGH_WATERMARK = CLIENT_QUEUE_SIZE // 2
+SLOW_CLIENT_TIMEOUT = 5.0
+
+# Further clients for a game are turned away once this many are connected
+MAX_CLIENTS_PER_GAME = 1000
+
+# Minimum time between broadcasts for a game (60 Hz); faster updates are coalesced
+BROADCAST_INTERVAL = 1 / 60
+pending_updates: Dict[str, bytes] = {}
+broadcast_timers: Dict[str, asyncio.TimerHandle] = {}
+
+@dataclass(eq=False)
+class Connection:
+    """A client WebSocket with its own bounded outbound queue and writer task"""
+    websocket: WebSocket
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE))
+    writer_task: Optional[asyncio.Task] = None
+    dropped_frames: int = 0
+    backlogged_since: Optional[float] = None
 
 async def init_redis():
     """Initialize Redis connection with error handling"""
     try:
-        client = await redis.Redis(
+        pool = redis.BlockingConnectionPool(
             host='localhost',
             port=6379,
             db=0,
-            decode_responses=True,
+            decode_responses=False,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            timeout=1,
             socket_timeout=5,
-            socket_connect_timeout=5
+            socket_connect_timeout=5,
+            socket_keepalive=True
         )
+        client = await redis.Redis(connection_pool=pool)
         # Test the connection
         await client.ping()
         logger.info("Successfully connected to Redis")
         return client
     except redis.ConnectionError as e:
-        logger.error(f"Failed to connect to Redis: {str(e)}")
+        logger.error("Failed to connect to Redis: %s", e)
         return None
     except Exception as e:
-        logger.error(f"Unexpected error connecting to Redis: {str(e)}")
+        logger.error("Unexpected error connecting to Redis: %s", e)
         return None
 
 @asynccontextmanager
@@ -79,37 +174,201 @@ async def lifespan(app: FastAPI):
     redis_client = await init_redis()
     if not redis_client:
         logger.error("Failed to initialize Redis. Server may not function correctly.")
+        relay_task = None
+    else:
+        relay_task = asyncio.create_task(relay_game_updates())
     
     yield
     
     # Shutdown
+    if relay_task:
+        # Let the relay reset its Pub/Sub connection before the pool is torn down
+        relay_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await relay_task
     if redis_client:
-        await redis_client.close()
+        await redis_client.close(close_connection_pool=True)
         logger.info("Disconnected from Redis")
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+
+def decode_message(frame, wire_format: str) -> ClientMessage:
+    """Decode and validate an incoming frame sent in the client's wire format"""
+    if wire_format == MSGPACK_FORMAT and isinstance(frame, bytes):
+        return msgpack_decoder.decode(frame)
+    return client_message_decoder.decode(frame)
+
+def encode_message(message: dict, wire_format: str):
+    """Encode a message as MessagePack bytes or JSON text for the given wire format"""
+    if wire_format == MSGPACK_FORMAT:
+        return msgpack_encoder.encode(message)
+    return orjson.dumps(message).decode()
+
+def encode_static_message(message: dict) -> Dict[str, object]:
+    """Encode a fixed message once for every wire format"""
+    return {wire_format: encode_message(message, wire_format) for wire_format in WIRE_FORMATS}
+
+# Fixed replies, encoded at import time instead of on every connection
+NO_GAME_STATE_FRAMES = encode_static_message({
+    "type": "info",
+    "message": "No existing game state found"
+})
+DATABASE_ERROR_FRAMES = encode_static_message({
+    "type": "error",
+    "message": "Database connection error"
+})
+
+async def send_frame(websocket: WebSocket, frame):
+    """Send an already encoded message as a binary or text frame straight to the ASGI send channel"""
+    if isinstance(frame, bytes):
+        await websocket.send({"type": "websocket.send", "bytes": frame})
+    else:
+        await websocket.send({"type": "websocket.send", "text": frame})
+
+async def send_message(websocket: WebSocket, message: dict):
+    """Send a message in the client's negotiated wire format"""
+    await send_frame(websocket, encode_message(message, websocket.state.wire_format))
+
+def enqueue_frame(connection: Connection, frame) -> bool:
+    """Queue a frame for a client, dropping its stalest pending frame when the queue is full.
+    Returns False once the client has fallen too far behind to keep"""
+    try:
+        connection.queue.put_nowait(frame)
+        connection.dropped_frames = 0
+    except asyncio.QueueFull:
+        connection.queue.get_nowait()
+        connection.queue.put_nowait(frame)
+        connection.dropped_frames += 1
+
+    if connection.queue.qsize() < QUEUE_HIGH_WATERMARK:
+        connection.backlogged_since = None
+    elif connection.backlogged_since is None:
+        connection.backlogged_since = time.monotonic()
+    elif time.monotonic() - connection.backlogged_since > SLOW_CLIENT_TIMEOUT:
+        return False
+    return connection.dropped_frames <= MAX_DROPPED_FRAMES
+
+def queue_message(connection: Connection, message: dict):
+    """Encode a message in the client's wire format and queue it for sending"""
+    enqueue_frame(connection, encode_message(message, connection.websocket.state.wire_format))
+
+async def connection_writer(game_id: str, connection: Connection):
+    """Drain a client's outbound queue so a slow socket only delays itself"""
+    try:
+        while True:
+            frame = await connection.queue.get()
+            await asyncio.wait_for(send_frame(connection.websocket, frame), SEND_TIMEOUT)
+    except asyncio.CancelledError:
+        raise
+    except asyncio.TimeoutError:
+        disconnect_slow_client(game_id, connection)
+    except Exception as e:
+        logger.error("Error sending to client for game %s: %s", game_id, e)
+        remove_connection(game_id, connection)
+
+def remove_connection(game_id: str, connection: Connection) -> bool:
+    """Drop a client from its game, deleting the game's entry once no clients remain"""
+    connections = active_connections.get(game_id)
+    if not connections or connection not in connections:
+        return False
+    connections.discard(connection)
+    if not connections:
+        del active_connections[game_id]
+    return True
+
+def disconnect_slow_client(game_id: str, connection: Connection):
+    """Close a client that cannot keep up with its game's updates"""
+    logger.warning("Disconnecting slow client for game %s", game_id)
+    remove_connection(game_id, connection)
+    connection.writer_task.cancel()
+    task = asyncio.create_task(close_slow_client(game_id, connection.websocket))
+    close_tasks.add(task)
+    task.add_done_callback(close_tasks.discard)
+
+async def close_slow_client(game_id: str, websocket: WebSocket):
+    """Close a slow client's socket, logging rather than raising if it is already gone"""
+    try:
+        await websocket.close(code=1011, reason="Client too slow")
+    except Exception as e:
+        logger.warning("Error closing slow client for game %s: %s", game_id, e)
 
-async def broadcast_update(game_id: str, update: dict):
-    """Broadcast updates to all connected clients for a game"""
-    if game_id in active_connections:
-        disconnected = []
-        for websocket in active_connections[game_id]:
+async def relay_game_updates():
+    """Forward game updates published by any worker to this worker's local clients"""
+    pubsub = redis_client.pubsub()
+    await pubsub.psubscribe(f"{GAME_UPDATES_CHANNEL}:*")
+    try:
+        while True:
             try:
-                await websocket.send_json(update)
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if not message:
+                    continue
+                game_id = message["channel"].decode().split(":", 1)[1]
+                cached = state_cache.get(game_id)
+                if cached and cached[1] != message["data"]:
+                    del state_cache[game_id]
+                if game_id in active_connections:
+                    await broadcast_update(game_id, message["data"])
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                disconnected.append(websocket)
-                logger.error(f"Error broadcasting update: {str(e)}")
-        
-        # Clean up disconnected clients
-        for websocket in disconnected:
-            if game_id in active_connections:
-                active_connections[game_id].remove(websocket)
+                logger.error("Error relaying game update: %s", e)
+                await asyncio.sleep(1)
+    finally:
+        await pubsub.reset()
+
+async def receive_frames(websocket: WebSocket):
+    """Yield raw text or binary frames from a client until it disconnects"""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        yield message.get("bytes") or message.get("text")
+
+async def broadcast_update(game_id: str, payload: bytes):
+    """Broadcast a JSON-encoded update to all connected clients for a game, at most
+    once per BROADCAST_INTERVAL; updates arriving in between are merged into the latest"""
+    if game_id in broadcast_timers:
+        pending_updates[game_id] = payload
+        return
+
+    send_update(game_id, payload)
+    broadcast_timers[game_id] = asyncio.get_running_loop().call_later(
+        BROADCAST_INTERVAL, flush_pending_update, game_id
+    )
+
+def flush_pending_update(game_id: str):
+    """Send the latest update held back during the last interval, if any"""
+    payload = pending_updates.pop(game_id, None)
+    if payload is None:
+        broadcast_timers.pop(game_id, None)
+        return
+
+    send_update(game_id, payload)
+    broadcast_timers[game_id] = asyncio.get_running_loop().call_later(
+        BROADCAST_INTERVAL, flush_pending_update, game_id
+    )
+
+def send_update(game_id: str, payload: bytes):
+    """Queue a JSON-encoded update for every connected client of a game"""
+    # JSON clients get the payload as stored in Redis; only other wire formats re-encode it
+    frames = {}
+    for connection in list(active_connections.get(game_id, ())):
+        wire_format = connection.websocket.state.wire_format
+        if wire_format not in frames:
+            if wire_format == MSGPACK_FORMAT:
+                frames[wire_format] = msgpack_encoder.encode(orjson.loads(payload))
+            else:
+                frames[wire_format] = payload.decode()
+        if not enqueue_frame(connection, frames[wire_format]):
+            disconnect_slow_client(game_id, connection)
 
 
 # Add this route handler right after your app definition
 @app.get("/")
-async def root():
-    return HTMLResponse(HTML_TEMPLATE)
+async def root(request: Request):
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return HTML_GZIP_RESPONSE
+    return HTML_RESPONSE
 
 # Setup CORS with more permissive settings for testing
 app.add_middleware(
@@ -130,25 +389,26 @@ async def health_check():
             return {
                 "status": "healthy",
                 "redis": "connected",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": datetime.now()
             }
         else:
             return {
                 "status": "degraded",
                 "redis": "disconnected",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": datetime.now()
             }
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
+        logger.error("Health check failed: %s", e)
         return {
             "status": "unhealthy",
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now()
         }
 
 @app.websocket("/ws/game/{game_id}")
 async def websocket_endpoint(websocket: WebSocket, game_id: str):
     """Handle WebSocket connections with enhanced error handling"""
+    connection = None
     try:
         # Check Redis connection before accepting
         if not redis_client:
@@ -156,22 +416,33 @@ async def websocket_endpoint(websocket: WebSocket, game_id: str):
             await websocket.close(code=1013, reason="Redis connection not available")
             return
 
+        if len(active_connections.get(game_id, ())) >= MAX_CLIENTS_PER_GAME:
+            logger.warning("Rejecting WebSocket connection for full game %s", game_id)
+            await websocket.close(code=1013, reason="Too many clients for this game")
+            return
+
         # Accept the connection
-        await websocket.accept()
-        logger.info(f"WebSocket connection accepted for game {game_id}")
+        if MSGPACK_FORMAT in websocket.scope.get("subprotocols", ()):
+            websocket.state.wire_format = MSGPACK_FORMAT
+            await websocket.accept(subprotocol=MSGPACK_FORMAT)
+        else:
+            requested = websocket.query_params.get("format")
+            websocket.state.wire_format = MSGPACK_FORMAT if requested == MSGPACK_FORMAT else JSON_FORMAT
+            await websocket.accept()
+        logger.info("WebSocket connection accepted for game %s", game_id)
 
         # Send immediate confirmation
-        await websocket.send_json({
+        await send_message(websocket, {
             "type": "connection_status",
             "status": "connected",
             "game_id": game_id,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now()
         })
 
-        # Add to active connections
-        if game_id not in active_connections:
-            active_connections[game_id] = []
-        active_connections[game_id].append(websocket)
+        # Start the client's writer and add to active connections
+        connection = Connection(websocket)
+        connection.writer_task = asyncio.create_task(connection_writer(game_id, connection))
+        active_connections.setdefault(game_id, set()).add(connection)
         
         try:
             # Ping Redis to ensure connection
@@ -180,48 +451,45 @@ async def websocket_endpoint(websocket: WebSocket, game_id: str):
             # Send initial game state if it exists
             initial_state = await get_game_state(game_id)
             if initial_state:
-                await websocket.send_json({
+                queue_message(connection, {
                     "type": "initial_state",
                     "data": initial_state
                 })
             else:
-                await websocket.send_json({
-                    "type": "info",
-                    "message": "No existing game state found"
-                })
+                enqueue_frame(connection, NO_GAME_STATE_FRAMES[websocket.state.wire_format])
 
             # Handle incoming messages
-            async for message in websocket.iter_json():
+            async for raw in receive_frames(websocket):
                 try:
-                    logger.debug(f"Received message: {message}")
-                    if message.get("type") == "request_update":
+                    message = decode_message(raw, websocket.state.wire_format)
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Received message: %r", message)
+                    if message.type == "request_update":
                         game_state = await get_game_state(game_id)
-                        await websocket.send_json({
+                        queue_message(connection, {
                             "type": "game_state_update",
                             "data": game_state or {}
                         })
                 except Exception as e:
-                    logger.error(f"Error processing message: {str(e)}")
-                    await websocket.send_json({
+                    logger.error("Error processing message: %s", e)
+                    queue_message(connection, {
                         "type": "error",
                         "message": f"Error processing message: {str(e)}"
                     })
 
         except redis.RedisError as e:
-            logger.error(f"Redis error during WebSocket connection: {str(e)}")
-            await websocket.send_json({
-                "type": "error",
-                "message": "Database connection error"
-            })
+            logger.error("Redis error during WebSocket connection: %s", e)
+            enqueue_frame(connection, DATABASE_ERROR_FRAMES[websocket.state.wire_format])
             
     except WebSocketDisconnect:
-        logger.info(f"WebSocket disconnected normally for game {game_id}")
+        logger.info("WebSocket disconnected normally for game %s", game_id)
     except Exception as e:
-        logger.error(f"Unexpected error in WebSocket connection: {str(e)}")
+        logger.error("Unexpected error in WebSocket connection: %s", e)
     finally:
-        if game_id in active_connections and websocket in active_connections[game_id]:
-            active_connections[game_id].remove(websocket)
-            logger.info(f"Removed connection for game {game_id}")
+        if connection:
+            connection.writer_task.cancel()
+            if remove_connection(game_id, connection):
+                logger.info("Removed connection for game %s", game_id)
 
 # Add a test data endpoint
 @app.post("/api/test/create/{game_id}")
@@ -234,7 +502,7 @@ async def create_test_data(game_id: str):
         test_data = {
             "game_state": {
                 "game_id": game_id,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": datetime.now(),
                 "shot_clock": 24.0,
                 "game_clock": 720.0,
                 "quarter": 1,
@@ -279,12 +547,11 @@ async def create_test_data(game_id: str):
             ]
         }
 
-        await redis_client.set(f"game_state:{game_id}", json.dumps(test_data))
-        await broadcast_update(game_id, test_data)
+        await save_game_state(game_id, test_data)
         
         return {"status": "success", "message": "Test data created"}
     except Exception as e:
-        logger.error(f"Error creating test data: {str(e)}")
+        logger.error("Error creating test data: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
     
 @app.post("/api/test/simulate/{game_id}")
@@ -302,32 +569,36 @@ async def simulate_game_update(game_id: str):
         player_positions = current_state["player_positions"]
 
         # Update game state
-        game_state["timestamp"] = datetime.now().isoformat()
+        game_state["timestamp"] = datetime.now()
         game_state["shot_clock"] = max(0, float(game_state["shot_clock"]) - 2.4)
         game_state["game_clock"] = max(0, float(game_state["game_clock"]) - 24.0)
 
         # First, clear any previous shooting states
+        players_changed = any(player.get("is_shooting", False) for player in player_positions)
         for player in player_positions:
             player["is_shooting"] = False
             player["shot_made"] = False
 
         # Simulate basketball play patterns
-        shooting_chance = random.random()
+        # Draw the tick's shot attempt, shooter and outcome rolls in one go
+        shooting_chance, shooter_roll, shot_roll = draw_uniform(0, 1, 3).tolist()
         if shooting_chance > 0.7:  # 30% chance of shot attempt
             # Choose a random player to shoot
-            shooter = random.choice(player_positions)
+            shooter = player_positions[int(shooter_roll * len(player_positions))]
             
             # Calculate shot probability based on position
-            distance_to_basket = math.sqrt(shooter["x"]**2 + (shooter["y"] - 5.5)**2)
-            is_three_pointer = distance_to_basket > 23.75  # NBA 3-point line
+            offset_y = shooter["y"] - BASKET_Y
+            distance_sq = shooter["x"] * shooter["x"] + offset_y * offset_y
+            is_three_pointer = distance_sq > THREE_POINT_DISTANCE_SQ
             
             # Base probability affected by distance
-            shot_probability = max(0.2, 1 - (distance_to_basket / 50))
+            shot_probability = max(0.2, 1 - (math.sqrt(distance_sq) / 50))
             
             # Simulate shot
-            shot_made = random.random() < shot_probability
+            shot_made = shot_roll < shot_probability
             
             # Set shooting status for the shooter
+            players_changed = True
             shooter["is_shooting"] = True
             shooter["shot_made"] = shot_made
             
@@ -340,73 +611,160 @@ async def simulate_game_update(game_id: str):
             game_state["last_action"] = "Players moving..."
 
         # Update player positions with role-based movement
-        for player in player_positions:
-            # Skip movement if player is shooting
-            if player.get("is_shooting", False):
-                continue
-
-            role = player.get("role", "undefined")
-            
-            if role == "PG":  # Point Guard - handles the ball more
-                # Stay near top of key
-                target_x = random.uniform(-10, 10)
-                target_y = random.uniform(25, 35)
-            elif role == "SG":  # Shooting Guard - moves around perimeter
-                # Move around three-point line
-                angle = random.uniform(0, math.pi)
-                target_x = 22 * math.cos(angle)
-                target_y = 22 * math.sin(angle) + 15
-            elif role == "C":  # Center - stays near paint
-                # Stay in the paint area
-                target_x = random.uniform(-8, 8)
-                target_y = random.uniform(5, 15)
-            
-            # Calculate direction to target
-            dx = target_x - player["x"]
-            dy = target_y - player["y"]
-            distance = math.sqrt(dx**2 + dy**2)
-            
-            if distance > 0:
-                # Normalize and apply movement
-                speed = random.uniform(0.5, 2.0)
-                player["velocity_x"] = (dx / distance) * speed
-                player["velocity_y"] = (dy / distance) * speed
-                player["x"] += player["velocity_x"]
-                player["y"] += player["velocity_y"]
-            
-            # Ensure players stay in bounds
-            player["x"] = max(-23, min(23, player["x"]))
-            player["y"] = max(2, min(45, player["y"]))
+        move_players(player_positions)
 
         update = {
             "game_state": game_state,
             "player_positions": player_positions
         }
 
-        # Store in Redis and broadcast
-        await redis_client.set(f"game_state:{game_id}", json.dumps(update))
-        await broadcast_update(game_id, update)
+        # Store in Redis and publish to every worker's clients
+        await save_game_state(game_id, update, players_changed)
         
         return {"status": "success", "message": "Game updated"}
     except Exception as e:
-        logger.error(f"Error simulating game update: {str(e)}")
+        logger.error("Error simulating game update: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
     
 
 
 
 
+def draw_uniform(low: float, high: float, size: int) -> np.ndarray:
+    """Take size uniform samples in [low, high) from the noise pool, refilling it when exhausted"""
+    global noise_pool, noise_index
+    if noise_index + size > len(noise_pool):
+        noise_pool = rng.random(max(NOISE_POOL_SIZE, size))
+        noise_index = 0
+    samples = noise_pool[noise_index:noise_index + size]
+    noise_index += size
+    return low + (high - low) * samples
+
+def move_players(player_positions: List[Dict]):
+    """Move every non-shooting player one step towards a random role-based target"""
+    movers = [player for player in player_positions if not player.get("is_shooting", False)]
+    count = len(movers)
+    if not count:
+        return
+
+    roles = np.array([player.get("role", "undefined") for player in movers])
+    x = np.fromiter((player["x"] for player in movers), dtype=np.float64, count=count)
+    y = np.fromiter((player["y"] for player in movers), dtype=np.float64, count=count)
+
+    # Players without a known role target their current spot and stay put
+    target_x = x.copy()
+    target_y = y.copy()
+
+    for role, ((x_low, x_high), (y_low, y_high)) in ROLE_TARGET_BOUNDS.items():
+        in_role = roles == role
+        role_count = int(in_role.sum())
+        target_x[in_role] = draw_uniform(x_low, x_high, role_count)
+        target_y[in_role] = draw_uniform(y_low, y_high, role_count)
+
+    # Shooting Guard - move around three-point line
+    sg = roles == "SG"
+    angle = draw_uniform(0, math.pi, int(sg.sum()))
+    target_x[sg] = SG_ARC_RADIUS * np.cos(angle)
+    target_y[sg] = SG_ARC_RADIUS * np.sin(angle) + SG_ARC_CENTER_Y
+
+    # Normalize direction to target and apply a random speed
+    dx = target_x - x
+    dy = target_y - y
+    distance = np.hypot(dx, dy)
+    moving = distance > 0
+    scale = np.divide(draw_uniform(0.5, 2.0, count), distance, out=np.zeros(count), where=moving)
+    velocity_x = dx * scale
+    velocity_y = dy * scale
+
+    # Ensure players stay in bounds
+    x = np.clip(x + velocity_x, -23, 23)
+    y = np.clip(y + velocity_y, 2, 45)
+
+    for player, px, py, vx, vy, moved in zip(movers, x.tolist(), y.tolist(),
+                                             velocity_x.tolist(), velocity_y.tolist(), moving.tolist()):
+        player["x"] = px
+        player["y"] = py
+        if moved:
+            player["velocity_x"] = vx
+            player["velocity_y"] = vy
+
+def pack_positions(player_positions: List[Dict]):
+    """Split players into metadata dicts and a packed (N, 4) float64 array of their positions"""
+    positions = np.array(
+        [[player[name] for name in POSITION_FIELDS] for player in player_positions],
+        dtype=POSITION_DTYPE
+    )
+    metadata = [
+        {key: value for key, value in player.items() if key not in POSITION_FIELDS}
+        for player in player_positions
+    ]
+    return metadata, positions.tobytes()
+
+def unpack_positions(metadata: List[Dict], packed: bytes) -> List[Dict]:
+    """Rebuild player dicts from metadata and a packed position array"""
+    positions = np.frombuffer(packed, dtype=POSITION_DTYPE).reshape(-1, len(POSITION_FIELDS))
+    return [
+        {**player, **dict(zip(POSITION_FIELDS, row))}
+        for player, row in zip(metadata, positions.tolist())
+    ]
+
+async def save_game_state(game_id: str, state: dict, players_changed: bool = True):
+    """Store game state and publish it for other workers in a single round trip.
+    Player metadata is only rewritten when players_changed is set"""
+    key = f"game_state:{game_id}"
+    players, positions = pack_positions(state["player_positions"])
+    # Serialize the game state once and splice it into the published update
+    game_state = orjson.dumps(state["game_state"])
+    payload = b'{"game_state":%b,"player_positions":%b}' % (
+        game_state, orjson.dumps(state["player_positions"])
+    )
+    async with redis_client.pipeline(transaction=False) as pipe:
+        fields = {"game_state": game_state, "positions": positions}
+        if players_changed:
+            fields["players"] = orjson.dumps(players)
+        pipe.hset(key, mapping=fields)
+        pipe.expire(key, GAME_STATE_TTL)
+        pipe.publish(f"{GAME_UPDATES_CHANNEL}:{game_id}", payload)
+        await pipe.execute()
+    cache_game_state(game_id, payload)
+
+def cache_game_state(game_id: str, payload: bytes):
+    """Remember the payload this worker just saved and evict cached games past their TTL"""
+    now = time.monotonic()
+    state_cache[game_id] = (now, payload)
+    state_cache.move_to_end(game_id)
+    while True:
+        oldest_id, (saved_at, _) = next(iter(state_cache.items()))
+        if now - saved_at < GAME_STATE_TTL:
+            break
+        del state_cache[oldest_id]
+
 async def get_game_state(game_id: str) -> Optional[Dict]:
-    """Get game state from Redis with error handling"""
+    """Get game state from the local cache or Redis with error handling"""
     try:
         if not redis_client:
             logger.error("Redis not connected")
             return None
-            
-        state = await redis_client.get(f"game_state:{game_id}")
-        return json.loads(state) if state else None
+
+        cached = state_cache.get(game_id)
+        if cached:
+            saved_at, payload = cached
+            if time.monotonic() - saved_at < GAME_STATE_TTL:
+                return orjson.loads(payload)
+            del state_cache[game_id]
+
+        game_state, players, positions = await redis_client.hmget(
+            f"game_state:{game_id}", "game_state", "players", "positions"
+        )
+        if not game_state:
+            return None
+
+        return {
+            "game_state": orjson.loads(game_state),
+            "player_positions": unpack_positions(orjson.loads(players or b"[]"), positions or b"")
+        }
     except Exception as e:
-        logger.error(f"Error retrieving game state: {str(e)}")
+        logger.error("Error retrieving game state: %s", e)
         return None
 
 HTML_TEMPLATE = """"
@@ -730,6 +1088,9 @@ HTML_TEMPLATE = """"
         let ws = null;
         let reconnectAttempts = 0;
         const maxReconnectAttempts = 3;
+        // Open the page with ?debug to log every received payload in full
+        const debugMessages = new URLSearchParams(window.location.search).has('debug');
+        const maxMessages = 200;
 
         function updateStatus(message, isError = false) {
             const status = document.getElementById('connection-status');
@@ -744,6 +1105,19 @@ HTML_TEMPLATE = """"
             messageDiv.style.color = isError ? 'red' : 'black';
             messageDiv.textContent = `${new Date().toLocaleTimeString()}: ${message}`;
             messages.insertBefore(messageDiv, messages.firstChild);
+            while (messages.childElementCount > maxMessages) {
+                messages.removeChild(messages.lastChild);
+            }
+        }
+
+        function describeMessage(data) {
+            if (data.type) {
+                return `Received ${data.type}${data.message ? `: ${data.message}` : ''}`;
+            }
+            if (data.game_state && data.player_positions) {
+                return `Received update @ ${data.game_state.timestamp}, ${data.player_positions.length} players`;
+            }
+            return 'Received message';
         }
 
         function clearMessages() {
@@ -917,7 +1291,9 @@ HTML_TEMPLATE = """"
                 ws.onmessage = (event) => {
                     try {
                         const data = JSON.parse(event.data);
-                        addMessage(`Received: ${JSON.stringify(data, null, 2)}`);
+                        addMessage(debugMessages
+                            ? `Received: ${JSON.stringify(data, null, 2)}`
+                            : describeMessage(data));
                         
                         if (data.type === "initial_state" && data.data) {
                             // Handle initial state
@@ -960,6 +1336,23 @@ HTML_TEMPLATE = """"
 
 """
 
+# The page is static, so it is encoded (and gzipped) once and the same responses are served on
+# every request
+HTML_HEADERS = {"Cache-Control": "public, max-age=3600", "Vary": "Accept-Encoding"}
+HTML_RESPONSE = Response(
+    content=HTML_TEMPLATE.encode("utf-8"),
+    media_type="text/html",
+    headers=HTML_HEADERS
+)
+HTML_GZIP_RESPONSE = Response(
+    content=gzip.compress(HTML_TEMPLATE.encode("utf-8"), compresslevel=9),
+    media_type="text/html",
+    headers={**HTML_HEADERS, "Content-Encoding": "gzip"}
+)
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, log_level="debug")
+    # "auto" resolves to uvloop wherever uvicorn[standard] installs it (Linux/macOS)
+    uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info",
+                loop="auto", http="httptools", ws="websockets",
+                ws_max_queue=32, ws_max_size=2 ** 20)
@@ -1,41 +1,216 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
+import joblib
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
-import tensorflow as tf
+
+SHOT_FEATURES = [
+    'shot_distance', 'shot_angle', 'defender_distance',
+    'previous_fg_percentage', 'quarter', 'time_remaining',
+    'score_differential', 'hot_hand_index'
+]
+
+# Court grid that recommendations are computed on: 50 columns across the court's width
+# and 47 rows along its length
+COURT_GRID_COLUMNS = 50
+COURT_GRID_ROWS = 47
+
+# Recommendations are returned as one structured array, a record per court position
+RECOMMENDATION_DTYPE = np.dtype([('x', np.float32), ('y', np.float32), ('probability', np.float32)])
+
+# Rows handled per parallel task in the compiled forest traversal
+FOREST_ROW_BLOCK = 256
+
+_forest_kernel = None
+
+# Numba's default threading layer must not be entered from several threads at once,
+# so concurrent predictions take turns on the (already parallel) kernel
+forest_kernel_lock = threading.Lock()
+
+def forest_kernel():
+    """
+    Numba-compiled forest traversal, built on first use so numba stays optional.
+    Rows are split into blocks processed in parallel; within a block each tree walks
+    all rows before the next tree, keeping its nodes in cache
+    """
+    global _forest_kernel
+    if _forest_kernel is None:
+        from numba import njit, prange
+        
+        @njit(parallel=True)
+        def traverse(X, roots, feature, threshold, left, right, value):
+            n_rows = X.shape[0]
+            probabilities = np.zeros(n_rows)
+            for block in prange((n_rows + FOREST_ROW_BLOCK - 1) // FOREST_ROW_BLOCK):
+                start = block * FOREST_ROW_BLOCK
+                stop = min(start + FOREST_ROW_BLOCK, n_rows)
+                for root in roots:
+                    for i in range(start, stop):
+                        node = root
+                        while feature[node] >= 0:
+                            if X[i, feature[node]] <= threshold[node]:
+                                node = left[node]
+                            else:
+                                node = right[node]
+                        probabilities[i] += value[node]
+            probabilities /= len(roots)
+            return probabilities
+        
+        _forest_kernel = traverse
+    return _forest_kernel
 
 class ShotPredictionModel:
     def __init__(self):
         self.scaler = StandardScaler()
         self.model = RandomForestClassifier(n_estimators=100, random_state=42)
+        self.onnx_session = None
+        self.forest = None
+        self.bin_edges = None
         
-    def preprocess_features(self, data):
+    def fit_preprocess(self, data):
         """
-        Preprocess shot data with relevant features
+        Fit the scaler on shot data and return its scaled features
         """
-        features = [
-            'shot_distance', 'shot_angle', 'defender_distance',
-            'previous_fg_percentage', 'quarter', 'time_remaining',
-            'score_differential', 'hot_hand_index'
-        ]
-        
-        X = data[features]
-        return self.scaler.fit_transform(X)
+        return self.scaler.fit_transform(data[SHOT_FEATURES])
+    
+    def preprocess(self, data):
+        """
+        Scale shot data with the already fitted scaler
+        """
+        return self.scaler.transform(data[SHOT_FEATURES])
     
     def train(self, training_data):
         """
         Train the shot prediction model
         """
-        X = self.preprocess_features(training_data)
+        X = self.fit_preprocess(training_data)
         y = training_data['shot_made']
         self.model.fit(X, y)
+        self.onnx_session = None
+        self.forest = None
+    
+    def save(self, path):
+        """
+        Persist the fitted scaler, forest and compiled forest arrays
+        """
+        joblib.dump(self, path, compress=3)
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Load a model saved with save(); an ONNX session has to be compiled again
+        """
+        model = joblib.load(path)
+        if model.forest is not None:
+            model.warm_forest_kernel()
+        return model
+    
+    def __getstate__(self):
+        # ONNX Runtime sessions cannot be pickled
+        state = self.__dict__.copy()
+        state['onnx_session'] = None
+        return state
+    
+    def compile_onnx(self):
+        """
+        Compile the fitted scaler and forest into one ONNX graph so batch predictions
+        run in ONNX Runtime instead of scikit-learn.
+        
+        Predictions are approximate: the graph scales in float32 and stores float32
+        thresholds, so a row near a split can take the other branch in some trees, each
+        moving its probability by up to 1/n_estimators
+        """
+        import onnxruntime as ort
+        from skl2onnx import convert_sklearn
+        from skl2onnx.common.data_types import FloatTensorType
+        from sklearn.pipeline import make_pipeline
+        
+        onnx_model = convert_sklearn(
+            make_pipeline(self.scaler, self.model),
+            initial_types=[('X', FloatTensorType([None, len(SHOT_FEATURES)]))],
+            options={id(self.model): {'zipmap': False}}
+        )
+        self.onnx_session = ort.InferenceSession(
+            onnx_model.SerializeToString(), providers=['CPUExecutionProvider']
+        )
+    
+    def compile_forest(self):
+        """
+        Flatten the fitted forest into contiguous node arrays (children indexed across
+        the whole forest) for batch predictions through the Numba traversal kernel.
+        
+        Thresholds are quantized losslessly: each feature's bin edges are the distinct
+        thresholds the forest splits it on, so comparing bin indices gives exactly the
+        same decisions as comparing the scaled float32 features scikit-learn compares,
+        with small integers in place of floats
+        """
+        trees = [estimator.tree_ for estimator in self.model.estimators_]
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])[:-1]
+        counts = np.concatenate([tree.value[:, 0, :] for tree in trees])
+        feature = np.concatenate([tree.feature for tree in trees])
+        threshold = np.concatenate([tree.threshold for tree in trees])
+        
+        self.bin_edges = [np.unique(threshold[feature == f]) for f in range(len(SHOT_FEATURES))]
+        bin_dtype = np.min_scalar_type(max(len(edges) for edges in self.bin_edges))
+        threshold_bins = np.zeros(len(threshold), dtype=bin_dtype)
+        for f, edges in enumerate(self.bin_edges):
+            split = feature == f
+            threshold_bins[split] = np.searchsorted(edges, threshold[split])
+        
+        self.forest = (
+            offsets.astype(np.int32),
+            feature.astype(np.int32),
+            threshold_bins,
+            np.concatenate([tree.children_left + offset for tree, offset in zip(trees, offsets)]).astype(np.int32),
+            np.concatenate([tree.children_right + offset for tree, offset in zip(trees, offsets)]).astype(np.int32),
+            counts[:, 1] / counts.sum(axis=1)
+        )
+        
+        self.warm_forest_kernel()
+    
+    def warm_forest_kernel(self):
+        """
+        Compile the kernel for the forest's array types and start Numba's worker threads
+        now, from the calling thread, rather than on the first (possibly pooled) prediction
+        """
+        forest_kernel()(np.zeros((1, len(SHOT_FEATURES)), dtype=self.forest[2].dtype), *self.forest)
+    
+    def bin_features(self, X):
+        """
+        Map scaled features to the forest's threshold bin indices
+        """
+        binned = np.empty(X.shape, dtype=self.forest[2].dtype)
+        for f, edges in enumerate(self.bin_edges):
+            # Trees compare float32 features, as in scikit-learn
+            binned[:, f] = np.searchsorted(edges, X[:, f].astype(np.float32))
+        return binned
     
     def predict_shot_probability(self, shot_features):
         """
         Predict probability of making a shot given features
         """
-        X = self.scaler.transform(shot_features.reshape(1, -1))
-        return self.model.predict_proba(X)[0][1]
+        return self.predict_batch(shot_features.reshape(1, -1))[0]
+    
+    def predict_batch(self, X):
+        """
+        Predict make probabilities for an (N, 8) matrix of shot features in one call.
+        Matches scikit-learn exactly, except through a compiled ONNX session (see compile_onnx)
+        """
+        if self.onnx_session is not None:
+            probabilities = self.onnx_session.run(['probabilities'], {'X': X.astype(np.float32, copy=False)})[0]
+            return probabilities[:, 1]
+        
+        X = self.scaler.transform(X)
+        if self.forest is not None:
+            binned = self.bin_features(X)
+            with forest_kernel_lock:
+                return forest_kernel()(binned, *self.forest)
+        
+        return self.model.predict_proba(X)[:, 1]
 
 class CourtHeatmap:
     def __init__(self, width=50, height=47):
@@ -45,13 +220,30 @@ class CourtHeatmap:
         
     def generate_heatmap(self, shots_data):
         """
-        Generate shot probability heatmap
+        Generate shot probability heatmap from a recommendations array or a list of shot dicts
+        """
+        if isinstance(shots_data, np.ndarray):
+            return self.generate_heatmap_arrays(
+                shots_data['x'], shots_data['y'], shots_data['probability']
+            )
+        
+        xs = np.array([shot['x'] for shot in shots_data], dtype=float)
+        ys = np.array([shot['y'] for shot in shots_data], dtype=float)
+        probabilities = np.array([shot['probability'] for shot in shots_data], dtype=float)
+        return self.generate_heatmap_arrays(xs, ys, probabilities)
+    
+    def generate_heatmap_arrays(self, xs, ys, probabilities):
+        """
+        Generate shot probability heatmap from parallel x, y and probability arrays,
+        resetting the grid in place
         """
-        for shot in shots_data:
-            x, y = self.convert_coordinates(shot['x'], shot['y'])
-            if 0 <= x < self.width and 0 <= y < self.height:
-                self.court_grid[y][x] = shot['probability']
+        grid_x, grid_y = self.convert_coordinates_array(xs, ys)
+        valid = (grid_x >= 0) & (grid_x < self.width) & (grid_y >= 0) & (grid_y < self.height)
         
+        # Scatter through flat cell indices on a view of the (contiguous) grid
+        cells = grid_y[valid] * self.width + grid_x[valid]
+        self.court_grid.fill(0)
+        self.court_grid.reshape(-1)[cells] = probabilities[valid]
         return self.court_grid
     
     def convert_coordinates(self, x, y):
@@ -67,37 +259,116 @@ class CourtHeatmap:
         grid_y = int(y * self.height/court_height)
         
         return grid_x, grid_y
+    
+    def convert_coordinates_array(self, xs, ys):
+        """
+        Convert arrays of court coordinates to grid coordinates, truncating like int()
+        """
+        grid_x = ((xs + 25) * (self.width / 50)).astype(np.intp)
+        grid_y = (ys * (self.height / 47)).astype(np.intp)
+        return grid_x, grid_y
 
 class RealTimeAnalytics:
     def __init__(self, shot_model):
         self.shot_model = shot_model
         self.heatmap = CourtHeatmap()
         
-    def update_recommendations(self, game_state, player_id):
+        # The court grid never changes, so its positions and the position-derived
+        # feature columns are computed once; each update only refills the rest
+        self.court_xs, self.court_ys = self.generate_court_positions()
+        self.court_features = self.create_shot_features_batch(
+            None, None, self.court_xs, self.court_ys
+        )
+        self.thread_buffers = threading.local()
+        self.court_recommendations = np.zeros(len(self.court_xs), dtype=RECOMMENDATION_DTYPE)
+        self.court_recommendations['x'] = self.court_xs
+        self.court_recommendations['y'] = self.court_ys
+        
+        # Persistent pool for scoring several players at once without joblib's per-call
+        # setup. Feature building and scikit-learn or ONNX scoring overlap across players;
+        # the compiled forest kernel is already parallel, so its calls take turns
+        self.executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+    
+    def close(self):
         """
-        Generate real-time shot recommendations
+        Shut down the scoring thread pool
         """
-        recommendations = []
-        court_positions = self.generate_court_positions()
+        self.executor.shutdown()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
         
-        for pos in court_positions:
-            features = self.create_shot_features(game_state, player_id, pos)
-            prob = self.shot_model.predict_shot_probability(features)
-            recommendations.append({
-                'x': pos[0],
-                'y': pos[1],
-                'probability': prob
-            })
+    def update_recommendations(self, game_state, player_id):
+        """
+        Generate real-time shot recommendations as a RECOMMENDATION_DTYPE array
+        with one (x, y, probability) record per court position
+        """
+        X = self.feature_buffer()
+        X[:, 2:] = self.game_state_features(game_state)
         
+        recommendations = self.court_recommendations.copy()
+        recommendations['probability'] = self.shot_model.predict_batch(X)
         return recommendations
     
+    async def update_recommendations_async(self, game_state, player_id):
+        """
+        Generate shot recommendations on the analytics thread pool so an async caller,
+        such as a WebSocket handler, keeps serving other clients meanwhile
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, self.update_recommendations, game_state, player_id
+        )
+    
+    def update_recommendations_for_players(self, player_states):
+        """
+        Generate recommendations for several players concurrently, given a mapping of
+        player id to that player's game state
+        """
+        recommendations = self.executor.map(
+            lambda item: self.update_recommendations(item[1], item[0]), player_states.items()
+        )
+        return dict(zip(player_states, recommendations))
+    
+    def feature_buffer(self):
+        """
+        This thread's copy of the court feature matrix, so concurrent updates never
+        overwrite each other's game-state columns
+        """
+        buffer = getattr(self.thread_buffers, 'features', None)
+        if buffer is None:
+            buffer = self.thread_buffers.features = self.court_features.copy()
+        return buffer
+    
+    def encode_probabilities(self, probabilities):
+        """
+        Pack court-grid probabilities into a binary WebSocket frame: little-endian uint16
+        column and row counts, then float32 probabilities in grid order (x varies slowest)
+        """
+        header = np.array([COURT_GRID_COLUMNS, COURT_GRID_ROWS], dtype='<u2')
+        return header.tobytes() + np.asarray(probabilities, dtype='<f4').tobytes()
+    
+    def encode_probability_delta(self, indices, probabilities):
+        """
+        Pack changed court-grid cells into a binary WebSocket frame: a zero uint16 marker
+        and the cell count, the uint16 cell indices (padded to a 4-byte boundary), then
+        their float32 probabilities
+        """
+        header = np.array([0, len(indices)], dtype='<u2')
+        padding = b'\0\0' if len(indices) % 2 else b''
+        return (header.tobytes() + np.asarray(indices, dtype='<u2').tobytes() + padding
+                + np.asarray(probabilities, dtype='<f4').tobytes())
+    
     def generate_court_positions(self):
         """
-        Generate grid of possible shot positions on court
+        Generate grid of possible shot positions on court as flat x and y arrays
         """
-        x = np.linspace(-25, 25, 50)
-        y = np.linspace(0, 47, 47)
-        return [(i, j) for i in x for j in y]
+        xs, ys = np.meshgrid(np.linspace(-25, 25, COURT_GRID_COLUMNS),
+                             np.linspace(0, 47, COURT_GRID_ROWS), indexing='ij')
+        return xs.ravel(), ys.ravel()
     
     def create_shot_features(self, game_state, player_id, position):
         """
@@ -116,6 +387,59 @@ class RealTimeAnalytics:
         ])
         
         return features
+    
+    def create_shot_features_batch(self, game_state, player_id, xs, ys):
+        """
+        Create an (N, 8) feature matrix for shots from positions (xs[i], ys[i]).
+        Without a game_state only the position columns are filled
+        """
+        X = np.empty((len(xs), 8))
+        X[:, 0] = np.hypot(xs, ys)     # shot_distance
+        X[:, 1] = np.arctan2(ys, xs)   # shot_angle
+        if game_state is not None:
+            X[:, 2:] = self.game_state_features(game_state)
+        
+        return X
+    
+    def game_state_features(self, game_state):
+        """
+        Feature values shared by every shot position in a game state
+        """
+        return [
+            game_state['defender_distance'],
+            game_state['player_fg_percentage'],
+            game_state['quarter'],
+            game_state['time_remaining'],
+            game_state['score_differential'],
+            game_state['hot_hand_index']
+        ]
+
+class HeatmapStream:
+    """
+    Encodes successive court-grid probabilities for one client: a full frame first, then
+    deltas holding only the cells that moved more than min_change from what the client has
+    """
+    def __init__(self, analytics, min_change=0.01):
+        self.analytics = analytics
+        self.min_change = min_change
+        self.client_grid = None
+    
+    def encode(self, probabilities):
+        """
+        Encode the next frame for the client and track the grid it will then hold
+        """
+        probabilities = np.asarray(probabilities, dtype=np.float32)
+        if self.client_grid is not None:
+            changed = np.flatnonzero(np.abs(probabilities - self.client_grid) > self.min_change)
+        
+        # A delta costs 6 bytes per cell against 4 for a full frame, so past two thirds
+        # of the grid changing the full frame is smaller
+        if self.client_grid is None or 3 * len(changed) > 2 * len(probabilities):
+            self.client_grid = probabilities.copy()
+            return self.analytics.encode_probabilities(probabilities)
+        
+        self.client_grid[changed] = probabilities[changed]
+        return self.analytics.encode_probability_delta(changed, probabilities[changed])
 
 # Example usage:
 def main():
@@ -0,0 +1,26 @@
+import math
+
+import numpy as np
+import pytest
+
+pytest.importorskip('aiohttp')
+pytest.importorskip('requests')
+
+from NBA_data_pipeline import nearest_defender_distance
+
+
+def test_nearest_defender_distance_matches_loop():
+    rng = np.random.default_rng(0)
+    n_frames, n_defenders, n_shots = 50, 5, 200
+    defender_xy = rng.uniform(-25, 47, (n_frames, n_defenders, 2))
+    shot_xy = rng.uniform(-25, 47, (n_shots, 2))
+    shot_frames = rng.integers(0, n_frames, n_shots)
+    
+    expected = [
+        min(math.dist(shot_xy[i], defender) for defender in defender_xy[shot_frames[i]])
+        for i in range(n_shots)
+    ]
+    
+    distances = nearest_defender_distance(shot_xy, shot_frames, defender_xy)
+    assert distances.dtype == np.float32
+    np.testing.assert_allclose(distances, expected, rtol=1e-6)
@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('redis')
+
+import server
+
+
+def test_cache_game_state_evicts_expired_games(monkeypatch):
+    monkeypatch.setattr(server, 'state_cache', server.OrderedDict())
+    for now, game_id in [(0.0, 'idle'), (10.0, 'live'), (server.GAME_STATE_TTL + 5.0, 'new')]:
+        monkeypatch.setattr(server.time, 'monotonic', lambda: now)
+        server.cache_game_state(game_id, b'{}')
+    
+    assert list(server.state_cache) == ['live', 'new']
+
+
+def test_disconnect_slow_client_tolerates_closed_socket():
+    class ClosedWebSocket:
+        async def close(self, code, reason):
+            raise RuntimeError("Cannot call close once a close message has been sent")
+    
+    async def disconnect():
+        connection = server.Connection(websocket=ClosedWebSocket())
+        connection.writer_task = asyncio.create_task(asyncio.sleep(60))
+        server.active_connections['g1'] = {connection}
+        server.disconnect_slow_client('g1', connection)
+        assert len(server.close_tasks) == 1
+        await asyncio.gather(*server.close_tasks)
+        await asyncio.sleep(0)
+    
+    asyncio.run(disconnect())
+    assert not server.close_tasks
+    assert 'g1' not in server.active_connections
@@ -0,0 +1,120 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from shotpredictor import RealTimeAnalytics, ShotPredictionModel
+
+
+@pytest.fixture(scope='module')
+def shot_model():
+    rng = np.random.default_rng(0)
+    n = 2000
+    data = pd.DataFrame({
+        'shot_distance': rng.uniform(0, 30, n),
+        'shot_angle': rng.uniform(-3, 3, n),
+        'defender_distance': rng.integers(0, 10, n),
+        'previous_fg_percentage': rng.uniform(0.3, 0.6, n),
+        'quarter': rng.integers(1, 5, n),
+        'time_remaining': rng.integers(0, 720, n),
+        'score_differential': rng.integers(-20, 20, n),
+        'hot_hand_index': rng.uniform(0, 1, n)
+    })
+    data['shot_made'] = (rng.uniform(size=n) < 1 - data['shot_distance'] / 40).astype(int)
+    model = ShotPredictionModel()
+    model.train(data)
+    return model
+
+
+def integer_game_state_rows(analytics):
+    """
+    Court-grid feature rows for a spread of integer-valued game states
+    """
+    rows = []
+    for quarter in range(1, 5):
+        for score_differential in range(-9, 10, 3):
+            X = np.array(analytics.court_features, dtype=np.float64)
+            X[:, 2:] = [4, 0, quarter, 60 * quarter, score_differential, 1]
+            rows.append(X)
+    return np.concatenate(rows)
+
+
+def test_compiled_forest_matches_sklearn(shot_model):
+    pytest.importorskip('numba')
+    with RealTimeAnalytics(shot_model) as analytics:
+        X = integer_game_state_rows(analytics)
+    expected = shot_model.model.predict_proba(shot_model.scaler.transform(X))[:, 1]
+    
+    shot_model.compile_forest()
+    try:
+        np.testing.assert_array_equal(shot_model.predict_batch(X), expected)
+    finally:
+        shot_model.forest = None
+
+
+@pytest.mark.parametrize('defender_distance, quarter, score_differential', [
+    (2, 2, -9), (4, 2, -9), (6, 1, 0), (5.3, 3, -4)
+])
+def test_court_features_match_float64_features(shot_model, defender_distance,
+                                               quarter, score_differential):
+    game_state = {'defender_distance': defender_distance, 'player_fg_percentage': 0.47,
+                  'quarter': quarter, 'time_remaining': 60 * quarter,
+                  'score_differential': score_differential, 'hot_hand_index': 1}
+    with RealTimeAnalytics(shot_model) as analytics:
+        X = np.array([
+            analytics.create_shot_features(game_state, 'p', (x, y))
+            for x, y in zip(analytics.court_xs, analytics.court_ys)
+        ])
+        X_batch = analytics.create_shot_features_batch(game_state, 'p', analytics.court_xs, analytics.court_ys)
+    expected = shot_model.model.predict_proba(shot_model.scaler.transform(X))[:, 1]
+    
+    np.testing.assert_array_equal(shot_model.predict_batch(X_batch), expected)
+
+
+def test_onnx_predictions_stay_close_to_sklearn(shot_model):
+    pytest.importorskip('onnxruntime')
+    pytest.importorskip('skl2onnx')
+    rng = np.random.default_rng(1)
+    n = 20000
+    X = np.column_stack([
+        rng.uniform(0, 30, n), rng.uniform(-3, 3, n), rng.uniform(0, 10, n),
+        rng.uniform(0.3, 0.6, n), rng.integers(1, 5, n), rng.uniform(0, 720, n),
+        rng.integers(-20, 20, n), rng.uniform(0, 1, n)
+    ])
+    expected = shot_model.predict_batch(X)
+    
+    shot_model.compile_onnx()
+    try:
+        deviation = np.abs(shot_model.predict_batch(X) - expected)
+    finally:
+        shot_model.onnx_session = None
+    
+    # Each tree that takes the other branch moves a prediction by at most 1/n_estimators
+    tree_vote = 1 / shot_model.model.n_estimators
+    assert deviation.max() <= 10 * tree_vote
+    assert deviation.mean() <= 0.25 * tree_vote
+
+
+def test_loaded_forest_scores_on_pool_and_exits(shot_model, tmp_path):
+    pytest.importorskip('numba')
+    path = tmp_path / 'model.joblib'
+    shot_model.compile_forest()
+    try:
+        shot_model.save(path)
+    finally:
+        shot_model.forest = None
+    
+    # Scoring on pool threads must not leave Numba's workers blocking interpreter exit
+    script = textwrap.dedent(f'''
+        from shotpredictor import RealTimeAnalytics, ShotPredictionModel
+        game_state = {{'defender_distance': 4, 'player_fg_percentage': 0.5, 'quarter': 2,
+                       'time_remaining': 120, 'score_differential': 3, 'hot_hand_index': 1}}
+        with RealTimeAnalytics(ShotPredictionModel.load({str(path)!r})) as analytics:
+            analytics.update_recommendations_for_players({{'a': game_state, 'b': game_state}})
+    ''')
+    subprocess.run([sys.executable, '-c', script], cwd=Path(__file__).parent.parent,
+                   check=True, timeout=60)